@@ -13,51 +13,384 @@
      This pseudo-comment can be placed at any point in the file. Conventionally
      it is placed just before the list of sets.
 
-  The class reads the entire file into memory and retains that memory as
-  long as the object instance exists.
+  Files are read as a stream of blocks; only the block currently being
+  converted is held in memory as integers.
 
   Ill-formatted files produce assertion errors.
 
+  Parsed instances are cached in a binary sidecar file (the input name
+  plus '.sccache') holding the weights and the sets in compressed
+  sparse row form.  Later loads memory-map the sidecar instead of
+  parsing the text.  The sidecar records the size, modification time
+  and content hash of the file it was built from and is rebuilt
+  whenever these no longer match.
+
 """
 
-from functools import reduce
+from array import array
+from collections import namedtuple
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+import warnings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Just for testing
 from sys import argv
 
+class Incidence(namedtuple('Incidence', ['offsets', 'indices'])):
+    '''
+      A 0/1 matrix in compressed sparse row form.  Row r holds the
+      columns indices[offsets[r]:offsets[r+1]], in increasing order.
+      offsets is an int64 array and indices an int32 array (either
+      array.array or a memoryview of the same type codes).
+    '''
+    __slots__ = ()
+
+    def row_count(self):
+        ''' Return the number of rows '''
+        return len(self.offsets) - 1
+
+    def row(self, r):
+        ''' Return the columns of row r '''
+        return self.indices[self.offsets[r]:self.offsets[r+1]]
+
+    def transpose(self, column_count):
+        ''' Return the incidence with rows and columns exchanged '''
+        if np is not None:
+            offsets = np.frombuffer(self.offsets, dtype=np.int64)
+            indices = np.frombuffer(self.indices, dtype=np.int32)
+            rows = np.repeat(np.arange(self.row_count(), dtype=np.int32),
+                             np.diff(offsets))
+            order = np.argsort(indices, kind='stable')
+            t_offsets = np.zeros(column_count+1, dtype=np.int64)
+            np.cumsum(np.bincount(indices, minlength=column_count),
+                      out=t_offsets[1:])
+            return Incidence(array('q', t_offsets.tobytes()),
+                             array('i', rows[order].tobytes()))
+        columns = [[] for _ in range(column_count)]
+        for r in range(self.row_count()):
+            for c in self.row(r):
+                columns[c].append(r)
+        t_offsets = array('q', [0])
+        t_indices = array('i')
+        for column in columns:
+            t_indices.extend(column)
+            t_offsets.append(len(t_indices))
+        return Incidence(t_offsets, t_indices)
+
+class IntervalSet():
+    '''
+      An immutable set of non-negative integers held as a tuple of
+      half-open runs (start, stop), sorted, disjoint and non-adjacent.
+      Sets that are unions of a few contiguous ranges, such as those of
+      the worst-k instances, take space and time proportional to their
+      number of runs rather than their number of elements.
+    '''
+    __slots__ = ('runs', '_len')
+
+    def __init__(self, runs=()):
+        ''' runs must already be sorted, disjoint and non-adjacent '''
+        self.runs = tuple(runs)
+        self._len = sum(stop - start for start, stop in self.runs)
+
+    @staticmethod
+    def from_sorted(elements):
+        ''' Return the IntervalSet of an increasing sequence of ints '''
+        runs = []
+        start = stop = None
+        for e in elements:
+            if e != stop:
+                if start is not None:
+                    runs.append((start, stop))
+                start = e
+            stop = e + 1
+        if start is not None:
+            runs.append((start, stop))
+        return IntervalSet(runs)
+
+    @staticmethod
+    def from_range(start, stop):
+        ''' Return the IntervalSet of range(start, stop) '''
+        return IntervalSet([(start, stop)] if start < stop else [])
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for start, stop in self.runs:
+            yield from range(start, stop)
+
+    def __contains__(self, e):
+        lo, hi = 0, len(self.runs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.runs[mid][1] <= e:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < len(self.runs) and self.runs[lo][0] <= e
+
+    def __eq__(self, other):
+        return isinstance(other, IntervalSet) and self.runs == other.runs
+
+    def __hash__(self):
+        return hash(self.runs)
+
+    def __repr__(self):
+        return 'IntervalSet({!r})'.format(list(self.runs))
+
+    def intersection_size(self, other):
+        ''' Return len(self & other) without building it '''
+        a, b = self.runs, other.runs
+        i = j = total = 0
+        while i < len(a) and j < len(b):
+            lo = max(a[i][0], b[j][0])
+            hi = min(a[i][1], b[j][1])
+            if lo < hi:
+                total += hi - lo
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return total
+
+    def difference(self, other):
+        ''' Return self - other '''
+        b = other.runs
+        runs = []
+        j = 0
+        for start, stop in self.runs:
+            while j < len(b) and b[j][1] <= start:
+                j += 1
+            k = j
+            while k < len(b) and b[k][0] < stop:
+                if b[k][0] > start:
+                    runs.append((start, b[k][0]))
+                start = max(start, b[k][1])
+                k += 1
+            if start < stop:
+                runs.append((start, stop))
+        return IntervalSet(runs)
+
+    def union(self, other):
+        ''' Return self | other '''
+        runs = []
+        a, b = self.runs, other.runs
+        i = j = 0
+        while i < len(a) or j < len(b):
+            if j == len(b) or (i < len(a) and a[i][0] <= b[j][0]):
+                start, stop = a[i]
+                i += 1
+            else:
+                start, stop = b[j]
+                j += 1
+            if runs and start <= runs[-1][1]:
+                runs[-1] = (runs[-1][0], max(runs[-1][1], stop))
+            else:
+                runs.append((start, stop))
+        return IntervalSet(runs)
+
+    __sub__ = difference
+    __or__ = union
+
+class Verification(namedtuple('Verification',
+                              ['ok', 'uncovered', 'redundant', 'invalid'])):
+    '''
+      Result of SetCover.verify.  ok is true if the sets form a cover.
+      uncovered lists the elements no set covers, redundant the IDs of
+      sets whose every element is also covered by another chosen set
+      (each could be dropped on its own), and invalid the IDs that are
+      not set IDs of the instance.
+    '''
+    __slots__ = ()
+
 class SetCover():
     '''
       Represent a set covering instance.
       The universe of elements is a dense sequence of non-negative values
       starting at 0.
+
+      Besides the frozenset interface, each set has an integer ID, its
+      0-origin position in list_of_sets, and the instance is available
+      as compressed sparse incidences indexed by these IDs.  Solutions
+      can be exchanged as lists of IDs (see check_ids, weight_of and
+      cover_weight), which avoids hashing large frozensets.  In OR
+      Library files a set's column number is its ID plus one.
     '''
-    def __init__(self, universe_count, list_of_sets, weights):
+    def __init__(self, universe_count, list_of_sets, weights,
+                 set_incidence=None, element_incidence=None, validate=True):
         '''
           list_of_sets may contain repeat values.  The weights list
           will have an entry for each instance.  The last weight
           associated with these instances will be chosen as the unique weight.
           This odd design is required because the OR Library files have
           multiple repeated values.
+
+          set_incidence and element_incidence, if given, are the
+          incidences (see below) already built by the loader.
+
+          If validate is false, the caller must call validate() itself.
         '''
-        assert 0 < universe_count
         assert type(list_of_sets) == list
-        assert len(weights) == len(list_of_sets)
-        flatten = set()
-        for s in list_of_sets:
-            flatten |= s
-        assert (0 == min(flatten) and
-                max(flatten) == universe_count-1 and
-                len(flatten) == universe_count)
-        assert 0 < min(weights)
-
         list_of_sets = [frozenset(l) for l in list_of_sets]
+        self.set_list = list_of_sets
         self.sets = set(list_of_sets)
         self.weight_list = weights
         self.weight_lookup = {}
+        self.id_lookup = {}
         for i, s in enumerate(list_of_sets):
             self.weight_lookup[s] = self.weight_list[i]
+            self.id_lookup[s] = i
         self._inf_weight = max(self.weight_list) + 1
         self.universe_count = universe_count
+        self._set_incidence = set_incidence
+        self._element_incidence = element_incidence
+        self._bitmasks = None
+        self._interval_sets = None
+        if validate:
+            self.validate()
+
+    def validate(self):
+        '''
+          Check that the sets cover exactly the elements 0 up to
+          universe_count-1 and that the weights are positive
+        '''
+        assert 0 < self.universe_count
+        assert len(self.weight_list) == len(self.set_list)
+        flatten = set()
+        for s in self.set_list:
+            flatten |= s
+        assert (0 == min(flatten) and
+                max(flatten) == self.universe_count-1 and
+                len(flatten) == self.universe_count)
+        assert 0 < min(self.weight_list)
+
+    def set_count(self):
+        ''' Return the number of sets, counting repeats '''
+        return len(self.set_list)
+
+    def distinct_ids(self):
+        '''
+          Return the IDs of the distinct sets, in increasing order.
+          For a repeated set this is the ID of its last instance, whose
+          weight is the one weight() reports.
+        '''
+        return sorted(self.id_lookup.values())
+
+    def set_incidence(self):
+        '''
+          Return the Incidence with one row per set ID, listing the
+          elements of that set
+        '''
+        if self._set_incidence is None:
+            offsets = array('q', [0])
+            indices = array('i')
+            for s in self.set_list:
+                indices.extend(sorted(s))
+                offsets.append(len(indices))
+            self._set_incidence = Incidence(offsets, indices)
+        return self._set_incidence
+
+    def element_incidence(self):
+        '''
+          Return the Incidence with one row per element, listing the IDs
+          of the sets containing that element.  OR Library files are
+          stored this way and their loaders keep it; otherwise it is
+          built from the set incidence on first use.
+        '''
+        if self._element_incidence is None:
+            self._element_incidence = self.set_incidence().transpose(
+                self.universe_count)
+        return self._element_incidence
+
+    def bitmasks(self):
+        '''
+          Return a list with, for each set ID, the set as an int whose
+          bit e is set if the set contains element e
+        '''
+        if self._bitmasks is None:
+            incidence = self.set_incidence()
+            self._bitmasks = [self._to_bitmask(incidence.row(i))
+                              for i in range(self.set_count())]
+        return self._bitmasks
+
+    def _to_bitmask(self, elements):
+        ''' Return the bitmask with the bits of elements set '''
+        if np is not None:
+            bits = np.zeros(self.universe_count, dtype=bool)
+            bits[np.frombuffer(elements, dtype=np.int32)] = True
+            return int.from_bytes(np.packbits(bits, bitorder='little')
+                                  .tobytes(), 'little')
+        # Binary digits, most significant (highest element) first
+        digits = bytearray(b'0' * self.universe_count)
+        for e in elements:
+            digits[-1-e] = ord('1')
+        return int(digits, 2)
+
+    def interval_sets(self):
+        '''
+          Return a list with, for each set ID, the set as an IntervalSet
+        '''
+        if self._interval_sets is None:
+            incidence = self.set_incidence()
+            if np is not None:
+                self._interval_sets = self._to_intervals(incidence)
+            else:
+                self._interval_sets = [
+                    IntervalSet.from_sorted(incidence.row(i))
+                    for i in range(self.set_count())]
+        return self._interval_sets
+
+    @staticmethod
+    def _to_intervals(incidence):
+        ''' Return the rows of incidence as IntervalSets, with NumPy '''
+        offsets = np.frombuffer(incidence.offsets, dtype=np.int64)
+        elements = np.frombuffer(incidence.indices, dtype=np.int32)
+        # A run starts at each row start and wherever the next element
+        # is not one more than the previous one
+        first = np.zeros(len(elements), dtype=bool)
+        first[offsets[:-1][offsets[:-1] < len(elements)]] = True
+        first[1:] |= np.diff(elements) != 1
+        heads = np.flatnonzero(first)
+        tails = np.append(heads[1:], len(elements)) - 1
+        starts = elements[heads].tolist()
+        stops = (elements[tails] + 1).tolist()
+        bounds = np.searchsorted(heads, offsets).tolist()
+        return [IntervalSet(zip(starts[bounds[i]:bounds[i+1]],
+                                stops[bounds[i]:bounds[i+1]]))
+                for i in range(incidence.row_count())]
+
+    def run_count(self):
+        '''
+          Return the total number of runs in the sets.  When this is
+          much smaller than the total size of the sets, the interval
+          representation pays off.
+        '''
+        return sum(len(s.runs) for s in self.interval_sets())
+
+    def universe_intervals(self):
+        ''' Return the universe as an IntervalSet '''
+        return IntervalSet.from_range(0, self.universe_count)
+
+    def universe_mask(self):
+        ''' Return the bitmask of the whole universe '''
+        return (1 << self.universe_count) - 1
+
+    def check_mask(self, ids):
+        ''' Check that the sets with the given IDs cover the universe '''
+        masks = self.bitmasks()
+        uncovered = self.universe_mask()
+        for i in ids:
+            uncovered &= ~masks[i]
+        return uncovered == 0
 
     def set_of_sets(self):
         ''' Return the set-of-frozensets that will form the cover '''
@@ -75,42 +408,158 @@ class SetCover():
         ''' Return a weight greater than any set's weight '''
         return self._inf_weight
 
+    def set_at(self, i):
+        ''' Return the set with ID i '''
+        return self.set_list[i]
+
+    def sets_of(self, ids):
+        ''' Return the list of sets with the given IDs '''
+        return [self.set_list[i] for i in ids]
+
+    def ids_of(self, sol):
+        '''
+          Return the IDs of a collection of sets of this instance, given
+          as sets or frozensets.  A repeated set maps to the ID of its
+          last instance.
+        '''
+        return [self.id_lookup[frozenset(s)] for s in sol]
+
+    def weight_of(self, i):
+        ''' Return the weight of the set with ID i '''
+        return self.weight_list[i]
+
+    def cover_weight(self, ids):
+        ''' Return the total weight of the sets with the given IDs '''
+        return sum(self.weight_list[i] for i in ids)
+
+    @staticmethod
+    def column_ids(ids):
+        '''
+          Return the OR Library column numbers (1-origin) of the given
+          set IDs (0-origin)
+        '''
+        return [i+1 for i in ids]
+
+    def from_column_ids(self, columns):
+        ''' Return the set IDs of the given OR Library column numbers '''
+        assert all(1 <= c <= self.set_count() for c in columns)
+        return [c-1 for c in columns]
+
+    def check_ids(self, ids):
+        ''' Check that the sets with the given IDs cover the set '''
+        return self.verify(ids).ok
+
     def check_solution(self, sol):
         ''' Check that a proposed solution covers the set '''
         # Check that solution is from the list of sets
         if any(s not in self.sets for s in sol):
             return False
         # Check that solution covers universe
-        return reduce(lambda a, b: a|b, sol, set()) == self.universe()
+        return self.check_ids(self.ids_of(sol))
+
+    def verify(self, ids):
+        '''
+          Check a proposed solution given as set IDs, in time linear in
+          the total size of its sets, and return a Verification.
+          Coverage is counted per element in one pass over the sets.
+        '''
+        invalid = [i for i in ids if not 0 <= i < self.set_count()]
+        ids = [i for i in ids if 0 <= i < self.set_count()]
+        incidence = self.set_incidence()
+        if np is not None:
+            rows = [np.frombuffer(incidence.row(i), dtype=np.int32)
+                    for i in ids]
+            count = np.bincount(np.concatenate(rows) if rows
+                                else np.zeros(0, dtype=np.int32),
+                                minlength=self.universe_count)
+            uncovered = np.flatnonzero(count == 0).tolist()
+            redundant = [i for i, row in zip(ids, rows)
+                         if len(row) == 0 or count[row].min() >= 2]
+        else:
+            count = array('i', [0]) * self.universe_count
+            for i in ids:
+                for e in incidence.row(i):
+                    count[e] += 1
+            uncovered = [e for e in range(self.universe_count)
+                         if count[e] == 0]
+            redundant = [i for i in ids
+                         if all(count[e] >= 2 for e in incidence.row(i))]
+        return Verification(not invalid and not uncovered,
+                            uncovered, redundant, invalid)
 
 class IntStream():
     '''
       Read a file that is a stream of integers, possibly with comment
       lines indicated by a leading '#'.
+
+      The file is read in blocks of BLOCK bytes and each block is
+      converted to an array of C ints, so only the block being
+      consumed is held in memory.
     '''
+    BLOCK = 1 << 18
+    COMMENT = re.compile(rb'^[ \t]*#.*$', re.MULTILINE)
+    SETFILE = re.compile(rb'^\s*##setfile\s*$', re.MULTILINE)
+
     def __init__(self, fname):
-        ''' Read the file entirely into memory '''
+        ''' Open the file and determine its type '''
         self.type = 'orfile' # default
-        self.ints = []
-        with open(fname, 'r', encoding='utf-8') as inp:
-            line = inp.readline().strip()
-            while line != '':
-                if line[0] != '#':
-                    self.ints.extend([int(s) for s in line.split()])
-                elif line[1:] == '#setfile':
-                    self.type='setfile'
-                line = inp.readline().strip()
+        with open(fname, 'rb') as inp:
+            if os.fstat(inp.fileno()).st_size > 0:
+                with mmap.mmap(inp.fileno(), 0,
+                               access=mmap.ACCESS_READ) as buf:
+                    if IntStream.SETFILE.search(buf):
+                        self.type = 'setfile'
+        self.blocks = self._read_blocks(fname)
+        self.ints = array('i')
         self.next = 0
 
+    @staticmethod
+    def _read_blocks(fname):
+        ''' Generate the integers of the file, one array per block '''
+        with open(fname, 'rb') as inp:
+            tail = b''
+            while True:
+                block = inp.read(IntStream.BLOCK)
+                if block == b'':
+                    break
+                block = tail + block
+                # Cut after the last complete token.  A trailing
+                # comment line is held back whole so that it is
+                # still recognised as a comment in the next block.
+                cut = block.rfind(b'\n') + 1
+                if not block[cut:].lstrip().startswith(b'#'):
+                    cut = max(cut, block.rfind(b' ') + 1,
+                              block.rfind(b'\t') + 1)
+                tail = block[cut:]
+                block = IntStream.COMMENT.sub(b'', block[:cut])
+                yield array('i', map(int, block.split()))
+            tail = IntStream.COMMENT.sub(b'', tail)
+            yield array('i', map(int, tail.split()))
+
+    def _fill(self, count):
+        '''
+          Buffer at least count unread integers.
+          Return False if the file ends first.
+        '''
+        while len(self.ints) - self.next < count:
+            block = next(self.blocks, None)
+            if block is None:
+                return False
+            del self.ints[:self.next]
+            self.ints.extend(block)
+            self.next = 0
+        return True
+
     def get_int(self):
         ''' Get the next integer from the stream '''
-        assert self.next < len(self.ints)
+        if self.next >= len(self.ints):
+            assert self._fill(1)
         self.next += 1
         return self.ints[self.next-1]
 
     def get_seq(self, count):
-        ''' Get the next count integers from the stream '''
-        assert self.next + count <= len(self.ints)
+        ''' Get the next count integers from the stream, as an array '''
+        assert self._fill(count)
         self.next += count
         return self.ints[self.next-count:self.next]
 
@@ -119,18 +568,175 @@ class IntStream():
             Assert that the stream is now empty.
             Call this to check that there are no trailing values.
         '''
-        assert self.next == len(self.ints)
+        assert not self._fill(1)
+
+class InstanceCache():
+    '''
+      Binary sidecar for a parsed set cover instance.
+
+      Layout, all in native byte order:
+        header   (see HEADER)
+        weights  set_count int64 values
+        offsets  set_count+1 int64 values; set i is elements[offsets[i]:
+                 offsets[i+1]]
+        elements int32 values, each set's elements in increasing order
+        covered  universe_count+1 int64 values; element e is in the sets
+                 covering[covered[e]:covered[e+1]]
+        covering int32 values, each element's set IDs in increasing order
+
+      The header records the size, modification time (ns) and BLAKE2b
+      digest of the source file.  A matching size and mtime is taken as
+      valid; a matching size with a different mtime falls back to
+      comparing digests, so touching a file does not force a rebuild;
+      the new mtime is then written to the header.  A sidecar whose
+      length does not match its header is ignored.
+    '''
+    SUFFIX = '.sccache'
+    MAGIC = b'SCPC'
+    VERSION = 2
+    HEADER = struct.Struct('=4sHHqqqqq32s')
+
+    def __init__(self, fname):
+        self.fname = fname
+        self.cache_name = fname + InstanceCache.SUFFIX
+
+    @staticmethod
+    def digest(fname):
+        ''' Return the content hash of file fname '''
+        h = hashlib.blake2b(digest_size=32)
+        with open(fname, 'rb') as inp:
+            for block in iter(lambda: inp.read(1 << 20), b''):
+                h.update(block)
+        return h.digest()
+
+    def _byteorder(self):
+        return 1 if sys.byteorder == 'little' else 2
+
+    @staticmethod
+    def length(universe_count, set_count, nnz):
+        ''' Return the size in bytes of a sidecar with these counts '''
+        return (InstanceCache.HEADER.size + 8*set_count + 8*(set_count+1) +
+                4*nnz + 8*(universe_count+1) + 4*nnz)
+
+    def _refresh(self, buf, mtime):
+        '''
+          Rewrite the mtime in the header of the sidecar held in buf.
+          Failure to write is silently ignored.
+        '''
+        fields = list(InstanceCache.HEADER.unpack_from(buf))
+        fields[7] = mtime
+        try:
+            with open(self.cache_name, 'r+b') as out:
+                out.write(InstanceCache.HEADER.pack(*fields))
+        except OSError:
+            pass
+
+    def load(self, validate=True):
+        '''
+          Return the SetCover held in the sidecar, or None if there is
+          no sidecar or it does not match the source file.  validate is
+          passed to SetCover.
+        '''
+        try:
+            st = os.stat(self.fname)
+            with open(self.cache_name, 'rb') as inp:
+                buf = mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        head = InstanceCache.HEADER
+        if len(buf) < head.size:
+            return None
+        (magic, version, order, universe_count, set_count, nnz,
+         size, mtime, digest) = head.unpack_from(buf)
+        if (magic != InstanceCache.MAGIC or
+                version != InstanceCache.VERSION or
+                order != self._byteorder() or
+                size != st.st_size or
+                min(universe_count, set_count, nnz) < 0 or
+                len(buf) != self.length(universe_count, set_count, nnz)):
+            return None
+        if mtime != st.st_mtime_ns:
+            if digest != self.digest(self.fname):
+                return None
+            # Same content: record the new mtime so that later loads
+            # need not hash the source again
+            self._refresh(buf, st.st_mtime_ns)
+        start = head.size
+        end = start + 8*set_count
+        weights = memoryview(buf)[start:end].cast('q')
+        start, end = end, end + 8*(set_count+1)
+        offsets = memoryview(buf)[start:end].cast('q')
+        start, end = end, end + 4*nnz
+        elements = memoryview(buf)[start:end].cast('i')
+        start, end = end, end + 8*(universe_count+1)
+        covered = memoryview(buf)[start:end].cast('q')
+        start, end = end, end + 4*nnz
+        covering = memoryview(buf)[start:end].cast('i')
+        incidence = Incidence(offsets, elements)
+        list_of_sets = [frozenset(incidence.row(i))
+                        for i in range(set_count)]
+        return SetCover(universe_count, list_of_sets, weights.tolist(),
+                        set_incidence=incidence,
+                        element_incidence=Incidence(covered, covering),
+                        validate=validate)
+
+    def store(self, sc):
+        '''
+          Write SetCover sc to the sidecar.  Failure to write (for
+          example, a read-only directory) is silently ignored.
+        '''
+        weights = array('q', sc.weight_list)
+        offsets, elements = sc.set_incidence()
+        covered, covering = sc.element_incidence()
+        try:
+            st = os.stat(self.fname)
+            header = InstanceCache.HEADER.pack(
+                InstanceCache.MAGIC, InstanceCache.VERSION,
+                self._byteorder(), sc.universe_count, sc.set_count(),
+                len(elements), st.st_size, st.st_mtime_ns,
+                self.digest(self.fname))
+            tmp_name = '{}.{}.tmp'.format(self.cache_name, os.getpid())
+            with open(tmp_name, 'wb') as out:
+                out.write(header)
+                out.write(weights)
+                out.write(offsets)
+                out.write(elements)
+                out.write(covered)
+                out.write(covering)
+            os.replace(tmp_name, self.cache_name)
+        except OSError:
+            pass
 
 class ORFile():
     '''
       Read and write files formatted according to OR Library conventions. See
       file header comment for URL describing file format.
     '''
-    def __init__(self, fname):
-        ''' Read in a set cover problem instance '''
+    def __init__(self, fname, use_cache=True, use_bulk=True, validate=True):
+        '''
+          Read in a set cover problem instance.
+          If use_cache is true, load from and maintain the binary sidecar.
+          If use_bulk is true and NumPy is installed, parse with BulkFile.
+          If validate is false, the caller must call the instance's
+          validate() itself; this lets the two stages be timed apart.
+        '''
+        if use_cache:
+            cache = InstanceCache(fname)
+            self.set_cover = cache.load(validate)
+            if self.set_cover is not None:
+                return
+        if use_bulk and np is not None:
+            self.set_cover = BulkFile(fname, validate).get_set_cover()
+        else:
+            self._parse(fname, validate)
+        if use_cache:
+            cache.store(self.set_cover)
+
+    def _parse(self, fname, validate=True):
+        ''' Parse the text of a set cover problem instance '''
         stream = IntStream(fname)
         if stream.type == 'setfile':
-            self.set_cover = SetFile(fname).get_set_cover()
+            self.set_cover = SetFile(fname, validate).get_set_cover()
             return
         universe_count = stream.get_int()
         set_count = stream.get_int()
@@ -138,14 +744,23 @@ class ORFile():
         element_member = []
         for i in range(set_count):
             element_member.append([])
+        # Keep the element-major lists as the element incidence
+        covered = array('q', [0])
+        covering = array('i')
         for i in range(universe_count):
             count = stream.get_int()
-            for s in stream.get_seq(count):
+            sets = sorted(set(stream.get_seq(count)))
+            for s in sets:
                 assert 1 <= s <= len(element_member)
                 element_member[s-1].append(i)
+                covering.append(s-1)
+            covered.append(len(covering))
         stream.assert_empty()
         element_member = [frozenset(l) for l in element_member]
-        self.set_cover = SetCover(universe_count, element_member, weight_list)
+        self.set_cover = SetCover(universe_count, element_member, weight_list,
+                                  element_incidence=Incidence(covered,
+                                                              covering),
+                                  validate=validate)
 
     def get_set_cover(self):
         ''' Return the set cover instance that was read in '''
@@ -190,7 +805,7 @@ class SetFile():
 
       This format does not accept replicated sets.
     '''
-    def __init__(self, fname):
+    def __init__(self, fname, validate=True):
         ''' Read in a set cover problem instance '''
         stream = IntStream(fname)
         assert stream.type == 'setfile'
@@ -205,7 +820,111 @@ class SetFile():
             assert s not in element_member
             element_member.append(s)
         stream.assert_empty()
-        self.set_cover = SetCover(universe_count, element_member, weight_list)
+        self.set_cover = SetCover(universe_count, element_member, weight_list,
+                                  validate=validate)
+
+    def get_set_cover(self):
+        ''' Return the set cover instance that was read in '''
+        return self.set_cover
+
+class BulkFile():
+    '''
+      Read a file in either OR Library or SetFile format using bulk
+      NumPy operations instead of the per-value IntStream calls.
+
+      Comments are stripped from the whole text with one regular
+      expression substitution and the remainder is converted with a
+      single NumPy call.  The only Python-level loop steps once per
+      record (per element in OR Library files, per set in SetFiles)
+      to locate the record counts; memberships are then gathered by
+      masking and grouped by set with a lexsort and bincount.
+
+      After loading, offsets and elements hold the sets in compressed
+      sparse row form: set i is elements[offsets[i]:offsets[i+1]].
+      For OR Library files the element incidence is kept as read.
+    '''
+    def __init__(self, fname, validate=True):
+        ''' Read in a set cover problem instance '''
+        assert np is not None, 'BulkFile requires NumPy'
+        with open(fname, 'rb') as inp:
+            text = inp.read()
+        setfile = IntStream.SETFILE.search(text) is not None
+        ints = self._to_ints(IntStream.COMMENT.sub(b'', text))
+        assert len(ints) >= 2
+        universe_count = int(ints[0])
+        set_count = int(ints[1])
+        assert len(ints) >= 2 + set_count
+        weight_list = ints[2:2+set_count].tolist()
+
+        record_count = set_count if setfile else universe_count
+        heads = np.empty(record_count, dtype=np.int64)
+        pos = 2 + set_count
+        for r in range(record_count):
+            assert pos < len(ints)
+            heads[r] = pos
+            pos += 1 + ints.item(pos)
+        assert pos == len(ints)
+        counts = ints[heads]
+        assert record_count == 0 or counts.min() >= 0
+        is_value = np.ones(len(ints), dtype=bool)
+        is_value[:2+set_count] = False
+        is_value[heads] = False
+        values = ints[is_value]
+        owners = np.repeat(np.arange(record_count, dtype=np.int64), counts)
+        if len(values) > 0:
+            if setfile:
+                assert 0 <= values.min() and values.max() < universe_count
+            else:
+                assert 1 <= values.min() and values.max() <= set_count
+        if setfile:
+            set_ids, elements = owners, values
+        else:
+            set_ids, elements = values - 1, owners
+        # Sort by set, then element, and drop repeated memberships
+        order = np.lexsort((elements, set_ids))
+        set_ids, elements = set_ids[order], elements[order]
+        keep = np.ones(len(set_ids), dtype=bool)
+        keep[1:] = (np.diff(set_ids) != 0) | (np.diff(elements) != 0)
+        set_ids, elements = set_ids[keep], elements[keep]
+        incidence = self._incidence(set_ids, elements, set_count)
+        self.offsets, self.elements = incidence
+        element_incidence = None
+        if not setfile:
+            # The file is element-major: keep that form too
+            order = np.lexsort((set_ids, elements))
+            element_incidence = self._incidence(
+                elements[order], set_ids[order], universe_count)
+
+        list_of_sets = [frozenset(incidence.row(i))
+                        for i in range(set_count)]
+        if setfile:
+            # SetFiles do not accept replicated sets
+            assert len(set(list_of_sets)) == len(list_of_sets)
+        self.set_cover = SetCover(universe_count, list_of_sets, weight_list,
+                                  set_incidence=incidence,
+                                  element_incidence=element_incidence,
+                                  validate=validate)
+
+    @staticmethod
+    def _incidence(rows, columns, row_count):
+        ''' Build an Incidence from (row, column) pairs sorted by row '''
+        offsets = np.zeros(row_count+1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=row_count), out=offsets[1:])
+        return Incidence(array('q', offsets.tobytes()),
+                         array('i', columns.astype(np.int32).tobytes()))
+
+    @staticmethod
+    def _to_ints(text):
+        ''' Convert whitespace-separated integers to an int64 array '''
+        try:
+            with warnings.catch_warnings():
+                # NumPy only warns when it meets non-integer data
+                warnings.simplefilter('error')
+                ints = np.fromstring(text, dtype=np.int64, sep=' ')
+        except (ValueError, DeprecationWarning):
+            ints = None
+        assert ints is not None, 'non-integer data in file'
+        return ints
 
     def get_set_cover(self):
         ''' Return the set cover instance that was read in '''
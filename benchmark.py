@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+  Benchmark set cover engines over a list of instance files.
+
+  Each (file, engine) pair is run in its own set-cover-approx.py
+  process with --skip_print.  The warm-up runs use --stats, which
+  builds the instance cache and records the memory of each stage; the
+  timed runs do not, as tracing memory slows them.  A run that exceeds
+  the time limit is killed together with any worker processes, and the
+  pair is reported as a timeout; a pair whose run fails is reported as
+  an error, with the end of its standard error, and the sweep goes on.
+
+  The times are those printed by set-cover-approx.py for the solver
+  call, so the CSV output has the columns of table.csv: instance name,
+  median time and cover size.
+'''
+# Standard modules
+import argparse
+import csv
+import json
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROGRAM = os.path.join(HERE, 'set-cover-approx.py')
+
+# Prefix of engine names that select an exact engine
+OPTIMAL = 'optimal:'
+
+# Lines of standard error kept from a failed run
+ERROR_LINES = 5
+
+class RunFailed(Exception):
+    ''' A run exited with a non-zero status; args[0] is its stderr tail '''
+
+def parse_args():
+    argp = argparse.ArgumentParser(description='Run set-cover-approx.py '
+        'over instance files and engines and tabulate the results')
+    argp.add_argument('inputs',
+        nargs='*',
+        help='Input files (default: worst-*.txt next to this script, in '
+        'increasing order)'
+        )
+    argp.add_argument('--engines',
+        nargs='+',
+        default=[OPTIMAL + 'enumerate'],
+        help='Engines to run: a greedy engine name, or ' + OPTIMAL +
+        'NAME for an exact engine (default: %(default)s)'
+        )
+    argp.add_argument('--repeats',
+        type=int,
+        default=5,
+        help='Timed runs per file and engine (default: %(default)s)'
+        )
+    argp.add_argument('--warmup',
+        type=int,
+        default=1,
+        help='Untimed runs per file and engine, made with --stats '
+        '(default: %(default)s)'
+        )
+    argp.add_argument('--timeout',
+        type=float,
+        default=60.0,
+        help='Limit in seconds on each run (default: %(default)s)'
+        )
+    argp.add_argument('--csv',
+        metavar='FILE',
+        help='Write name,time,size rows, as in table.csv; with several '
+        'engines, one file per engine, named FILE with -ENGINE before '
+        'the suffix'
+        )
+    argp.add_argument('--json',
+        metavar='FILE',
+        help='Write every result, with run times and stage statistics'
+        )
+    return argp.parse_args()
+
+def default_inputs():
+    ''' Return the worst-*.txt files next to this script, by size '''
+    names = [f for f in os.listdir(HERE) if re.fullmatch(r'worst-\d+\.txt', f)]
+    names.sort(key=lambda f: int(re.search(r'\d+', f).group()))
+    return [os.path.join(HERE, f) for f in names]
+
+def command(fname, engine, stats=None):
+    ''' Return the command line running engine on fname '''
+    args = [sys.executable, PROGRAM, fname, '--skip_print']
+    if engine.startswith(OPTIMAL):
+        args += ['--use_optimal', '--optimal_engine', engine[len(OPTIMAL):]]
+    else:
+        args += ['--engine', engine]
+    if stats is not None:
+        args += ['--stats', stats]
+    return args
+
+def run(args, timeout):
+    '''
+        Run args and return its standard output, or None if it did not
+        finish within timeout seconds.  Raise RunFailed if it exited
+        with a non-zero status.  The process is started in its own
+        session so that, on timeout, any worker processes it has started
+        are killed with it.
+    '''
+    proc = subprocess.Popen(args, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True,
+                            start_new_session=True)
+    try:
+        out, err = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if hasattr(os, 'killpg'):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+        proc.communicate()
+        return None
+    if proc.returncode != 0:
+        raise RunFailed('\n'.join(err.splitlines()[-ERROR_LINES:]))
+    return out
+
+def parse_output(out):
+    ''' Return the time, cover size and weight printed by a run '''
+    lines = [l for l in out.splitlines() if l != '*** Not a solution! ***']
+    return float(lines[0]), int(lines[1]), int(lines[2])
+
+def summarize(times):
+    ''' Return the median and interquartile range of times '''
+    if len(times) < 2:
+        return times[0], 0.0
+    q1, _, q3 = statistics.quantiles(times, n=4)
+    return statistics.median(times), q3 - q1
+
+def bench(fname, engine, repeats, warmup, timeout):
+    '''
+        Return the result of benchmarking engine on fname, as a dict.
+        A run that fails sets the status to 'error' and records the end
+        of its standard error.
+    '''
+    result = {
+        'name': os.path.splitext(os.path.basename(fname))[0],
+        'input': fname,
+        'engine': engine,
+        'status': 'ok',
+        'times': [],
+        }
+    try:
+        return bench_runs(result, fname, engine, repeats, warmup, timeout)
+    except RunFailed as e:
+        result.update(status='error', error=e.args[0])
+        return result
+
+def bench_runs(result, fname, engine, repeats, warmup, timeout):
+    ''' Make the runs of bench(), filling in and returning result '''
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = os.path.join(tmp, 'stats.json')
+        for _ in range(warmup):
+            if run(command(fname, engine, stats), timeout) is None:
+                result['status'] = 'timeout'
+                return result
+        if warmup > 0:
+            with open(stats) as inp:
+                result['stats'] = json.load(inp)['stages']
+    for _ in range(repeats):
+        out = run(command(fname, engine), timeout)
+        if out is None:
+            result['status'] = 'timeout'
+            return result
+        elapsed, size, weight = parse_output(out)
+        result['times'].append(elapsed)
+        result.update(size=size, weight=weight)
+    if result['times']:
+        result['median'], result['iqr'] = summarize(result['times'])
+    return result
+
+def csv_name(fname, engine, engines):
+    ''' Return the CSV file name for engine '''
+    if len(engines) == 1:
+        return fname
+    root, ext = os.path.splitext(fname)
+    return '{}-{}{}'.format(root, engine.replace(':', '-'), ext)
+
+def write_csv(results, fname, engines):
+    ''' Write the finished results as table.csv rows, one file per engine '''
+    for engine in engines:
+        with open(csv_name(fname, engine, engines), 'w', newline='') as out:
+            writer = csv.writer(out, lineterminator='\n')
+            for r in results:
+                if r['engine'] == engine and 'median' in r:
+                    writer.writerow([r['name'], '{:.3f}'.format(r['median']),
+                                     r['size']])
+
+def main(args):
+    ''' Run the benchmark and write the requested outputs '''
+    inputs = args.inputs or default_inputs()
+    if not inputs:
+        sys.exit('No input files given, and no worst-*.txt files in ' + HERE)
+    results = []
+    for engine in args.engines:
+        for fname in inputs:
+            r = bench(fname, engine, args.repeats, args.warmup, args.timeout)
+            results.append(r)
+            if 'median' in r:
+                print('{} {} median {:.3f} iqr {:.3f} size {} weight {}'.format(
+                    r['name'], engine, r['median'], r['iqr'], r['size'],
+                    r['weight']), flush=True)
+            else:
+                print('{} {} {}'.format(r['name'], engine, r['status']),
+                      flush=True)
+                if 'error' in r:
+                    print(r['error'], file=sys.stderr, flush=True)
+    if args.csv:
+        write_csv(results, args.csv, args.engines)
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(results, out, indent=2)
+            print(file=out)
+
+if __name__ == '__main__':
+    main(parse_args())
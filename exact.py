@@ -0,0 +1,744 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+  Exact (minimum) set cover engines.
+
+  Each engine takes an ORFile.SetCover instance and returns a list of
+  set IDs (positions in instance.set_list) forming a cover of minimum
+  size, or, for weighted_search, of minimum total weight.  The engines
+  search a ReducedInstance, in which sets and elements are replaced by
+  bitmask columns and rows, and use a greedy cover as the initial
+  incumbent.
+'''
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import math
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Gray-code engines refuse instances with more distinct sets than this:
+# a walk of 2^GRAY_MAX_COLUMNS pure-Python steps takes seconds, and
+# each further set doubles it
+GRAY_MAX_COLUMNS = 24
+
+# Default number of entries kept by a TranspositionTable
+TABLE_CAPACITY = 1 << 20
+
+@functools.lru_cache(maxsize=None)
+def _scipy():
+    '''
+      Return the scipy package with its optimize and sparse modules
+      loaded, or None if SciPy is not installed.  Importing them takes
+      longer than a greedy run, so it is left to the first engine that
+      needs them.
+    '''
+    try:
+        import scipy.optimize
+        import scipy.sparse
+    except ImportError:
+        return None
+    return scipy
+
+def scipy_available():
+    ''' Return whether SciPy, needed by the milp engines, is installed '''
+    return _scipy() is not None
+
+class ReducedInstance():
+    '''
+      A SetCover instance reduced for exact search.
+
+      Only the distinct sets are kept, as columns 0..column_count-1;
+      ids[c] is the set ID of column c.  Elements contained in exactly
+      the same sets are merged into one row, and a row whose sets
+      include all the sets of another row is dropped, since covering
+      the other row covers it too.  A choice of columns covers the
+      instance if and only if it covers every row.
+
+      masks[c] is the bitmask of the rows in column c, row_masks[r]
+      the bitmask and row_columns[r] the list of the columns containing
+      row r (the element-to-sets index of the reduced instance), and
+      full the bitmask of all rows.  weights[c] is the weight of
+      column c's set.
+    '''
+    def __init__(self, instance):
+        self.ids = instance.distinct_ids()
+        self.column_count = len(self.ids)
+        self.weights = [instance.weight_list[i] for i in self.ids]
+        set_masks = instance.bitmasks()
+        # Refine the universe into classes of elements with the same
+        # sets, tracking the columns of each class as a bitmask
+        classes = [(instance.universe_mask(), 0)]
+        for c, i in enumerate(self.ids):
+            m = set_masks[i]
+            split = []
+            for elements, columns in classes:
+                inside = elements & m
+                if inside == 0:
+                    split.append((elements, columns))
+                elif inside == elements:
+                    split.append((elements, columns | 1 << c))
+                else:
+                    split.append((inside, columns | 1 << c))
+                    split.append((elements ^ inside, columns))
+            classes = split
+        # Drop rows implied by another row
+        by_size = sorted((columns for _, columns in classes),
+                         key=lambda columns: columns.bit_count())
+        rows = []
+        for columns in by_size:
+            assert columns != 0, 'instance has no cover'
+            if all(kept & ~columns for kept in rows):
+                rows.append(columns)
+        self.row_count = len(rows)
+        self.row_masks = rows
+        self.full = (1 << self.row_count) - 1
+        self.masks = [0] * self.column_count
+        self.row_columns = []
+        for r, columns in enumerate(rows):
+            self.row_columns.append(list(_bits(columns)))
+            for c in self.row_columns[-1]:
+                self.masks[c] |= 1 << r
+
+    def greedy(self, weighted=False):
+        '''
+          Return a greedy cover, as a list of columns.  If weighted,
+          choose by least weight per new row rather than most new rows.
+        '''
+        uncovered = self.full
+        cover = []
+        while uncovered:
+            if weighted:
+                c = min((c for c in range(self.column_count)
+                         if self.masks[c] & uncovered),
+                        key=lambda c: self.weights[c] /
+                        (self.masks[c] & uncovered).bit_count())
+            else:
+                c = max(range(self.column_count),
+                        key=lambda c: (self.masks[c] & uncovered).bit_count())
+            cover.append(c)
+            uncovered &= ~self.masks[c]
+        return cover
+
+    def set_ids(self, columns):
+        ''' Return the set IDs of a list of columns '''
+        return [self.ids[c] for c in columns]
+
+def _bits(mask):
+    ''' Generate the positions of the set bits of mask, lowest first '''
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def _rarest_candidates(red, uncovered, allowed):
+    '''
+      Return the allowed columns of the uncovered row of red with the
+      fewest allowed columns, those covering most uncovered rows first
+    '''
+    candidates = min((red.row_masks[r] & allowed for r in _bits(uncovered)),
+                     key=lambda columns: columns.bit_count())
+    return sorted(_bits(candidates),
+                  key=lambda c: -(red.masks[c] & uncovered).bit_count())
+
+def branch_and_bound(instance):
+    '''
+      Include/exclude search over the columns in decreasing size order,
+      keeping only the best cover found so far.  A branch is pruned when
+      the remaining columns cannot cover the uncovered rows, or when
+      its size plus ceil(uncovered rows / largest remaining column)
+      cannot beat the incumbent.  The search is depth first on an
+      explicit stack, since its depth is the number of columns; the
+      chosen columns of a node are a linked list (column, rest) shared
+      with its parent.
+    '''
+    red = ReducedInstance(instance)
+    order = sorted(range(red.column_count),
+                   key=lambda c: (-red.masks[c].bit_count(), c))
+    masks = [red.masks[c] for c in order]
+    sizes = [m.bit_count() for m in masks]
+    suffix = [0] * (len(masks) + 1)
+    for k in reversed(range(len(masks))):
+        suffix[k] = suffix[k+1] | masks[k]
+    best = red.greedy()
+
+    # Entries are (position, uncovered rows, cover size, chosen columns)
+    stack = [(0, red.full, 0, None)]
+    while stack:
+        k, uncovered, size, chosen = stack.pop()
+        if uncovered == 0:
+            if size < len(best):
+                best = []
+                while chosen is not None:
+                    best.append(order[chosen[0]])
+                    chosen = chosen[1]
+            continue
+        if suffix[k] & uncovered != uncovered:
+            continue
+        if size - (-uncovered.bit_count() // sizes[k]) >= len(best):
+            continue
+        # Push the exclusion first so that the inclusion is tried first
+        stack.append((k+1, uncovered, size, chosen))
+        if masks[k] & uncovered:
+            stack.append((k+1, uncovered & ~masks[k], size+1, (k, chosen)))
+    return red.set_ids(best)
+
+def element_branching(instance):
+    '''
+      Search by choosing the uncovered row with the fewest columns still
+      allowed and branching on which of them covers it.  Once a column
+      has been tried for a row, later branches exclude it, so no cover
+      is visited twice.  Branches are pruned when their size plus
+      ceil(uncovered rows / largest column) cannot beat the incumbent.
+    '''
+    red = ReducedInstance(instance)
+    masks = red.masks
+    largest = max(m.bit_count() for m in masks)
+    best = red.greedy()
+    chosen = []
+
+    def search(uncovered, allowed):
+        nonlocal best
+        if uncovered == 0:
+            if len(chosen) < len(best):
+                best = list(chosen)
+            return
+        if len(chosen) - (-uncovered.bit_count() // largest) >= len(best):
+            return
+        for c in _rarest_candidates(red, uncovered, allowed):
+            chosen.append(c)
+            search(uncovered & ~masks[c], allowed)
+            chosen.pop()
+            allowed &= ~(1 << c)
+
+    search(red.full, (1 << red.column_count) - 1)
+    return red.set_ids(best)
+
+def iterative_deepening(instance):
+    '''
+      Ask "is there a cover of k columns?" for k = 1, 2, ... and stop at
+      the first k that has one.  The search starts at the lower bound
+      ceil(rows / largest column) and stops below the size of the greedy
+      incumbent, which is optimal if no smaller cover exists.  Each test
+      branches on the rarest uncovered row, as in element_branching,
+      and prunes when ceil(uncovered rows / largest gain of an allowed
+      column) exceeds the columns left to choose.
+    '''
+    red = ReducedInstance(instance)
+    masks = red.masks
+    incumbent = red.greedy()
+
+    def search(uncovered, allowed, k):
+        ''' Return at most k columns covering uncovered, or None '''
+        if uncovered == 0:
+            return []
+        if k == 0:
+            return None
+        gain = max((masks[c] & uncovered).bit_count()
+                   for c in _bits(allowed)) if allowed else 0
+        if gain == 0 or -(-uncovered.bit_count() // gain) > k:
+            return None
+        for c in _rarest_candidates(red, uncovered, allowed):
+            cover = search(uncovered & ~masks[c], allowed, k-1)
+            if cover is not None:
+                return [c] + cover
+            allowed &= ~(1 << c)
+        return None
+
+    largest = max(m.bit_count() for m in masks)
+    for k in range(-(-red.row_count // largest), len(incumbent)):
+        cover = search(red.full, (1 << red.column_count) - 1, k)
+        if cover is not None:
+            return red.set_ids(cover)
+    return red.set_ids(incumbent)
+
+def _gray_walk(columns, row_count, prefix, low):
+    '''
+      Visit every subset of columns that contains exactly the columns
+      >= low given by the bitmask prefix, stepping through the subsets
+      of columns < low in Gray-code order.  Each step adds or removes
+      one column and updates per-row coverage counters.  columns[c] is
+      the list of rows of column c.  Return the bitmask of a smallest
+      covering subset visited, or None.
+    '''
+    count = [0] * row_count
+    uncovered = row_count
+    for c in _bits(prefix):
+        for r in columns[c]:
+            if count[r] == 0:
+                uncovered -= 1
+            count[r] += 1
+    subset = prefix
+    size = prefix.bit_count()
+    best = prefix if uncovered == 0 else None
+    best_size = size if uncovered == 0 else len(columns) + 1
+    for t in range(1, 1 << low):
+        c = (t & -t).bit_length() - 1
+        subset ^= 1 << c
+        if subset >> c & 1:
+            size += 1
+            for r in columns[c]:
+                if count[r] == 0:
+                    uncovered -= 1
+                count[r] += 1
+        else:
+            size -= 1
+            for r in columns[c]:
+                count[r] -= 1
+                if count[r] == 0:
+                    uncovered += 1
+        if uncovered == 0 and size < best_size:
+            best, best_size = subset, size
+    return best
+
+def _gray_columns(instance):
+    ''' Return the ReducedInstance of instance and its column row lists '''
+    red = ReducedInstance(instance)
+    assert red.column_count <= GRAY_MAX_COLUMNS, \
+        'too many sets for Gray-code enumeration'
+    return red, [list(_bits(m)) for m in red.masks]
+
+def gray_code(instance):
+    '''
+      Walk all 2^m subsets of the m columns in Gray-code order, so each
+      step adds or removes exactly one column, and keep the smallest
+      one that covers every row.  Suited to instances with few sets,
+      such as the worst-k family (k+2 sets).
+    '''
+    red, columns = _gray_columns(instance)
+    best = _gray_walk(columns, red.row_count, 0, red.column_count)
+    return red.set_ids(_bits(best))
+
+def gray_code_parallel(instance, workers=None):
+    '''
+      gray_code split across a process pool.  The top columns are fixed
+      to each of their possible values to make independent prefixes;
+      each task walks the Gray code of the remaining columns under its
+      prefix.  workers defaults to the number of CPUs.
+    '''
+    red, columns = _gray_columns(instance)
+    workers = workers or os.cpu_count() or 1
+    # About four tasks per worker, to even out their load
+    fixed = min(red.column_count, (4 * workers - 1).bit_length())
+    low = red.column_count - fixed
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_gray_walk,
+                           *zip(*[(columns, red.row_count, p << low, low)
+                                  for p in range(1 << fixed)]))
+        best = min((r for r in results if r is not None),
+                   key=lambda r: r.bit_count())
+    return red.set_ids(_bits(best))
+
+class TranspositionTable():
+    '''
+      A size-bounded map from subproblem keys to what is known of their
+      solutions, evicting the least recently used entry when full.
+      hits, misses and evictions count lookups that found an entry,
+      lookups that did not, and entries dropped to make room.
+    '''
+    def __init__(self, capacity=TABLE_CAPACITY):
+        assert capacity > 0
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        ''' Return (True, entry) if key is held, else (False, None) '''
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def store(self, key, entry):
+        ''' Record entry for key '''
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        ''' Return the table statistics as a dict '''
+        return {'size': len(self.entries), 'capacity': self.capacity,
+                'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+def memoized(instance, table=None):
+    '''
+      element_branching without column exclusion, where each subproblem
+      "cover these rows" is keyed by the bitmask of the uncovered rows
+      and its result remembered.  The bitmask is exact, so keys never
+      collide, and the depth is at most the size of the cover.
+
+      The search starts from the greedy incumbent and asks each
+      subproblem only for a cover smaller than a limit.  Branches are
+      pruned when ceil(uncovered rows / largest column) reaches the
+      limit.  A subproblem that is solved stores its smallest cover; one
+      that has no cover below the limit stores the limit as a lower
+      bound, which later lookups use for pruning.  table is the
+      TranspositionTable to use, by default a new one of TABLE_CAPACITY
+      entries; pass one in to read its statistics afterwards.
+    '''
+    red = ReducedInstance(instance)
+    masks = red.masks
+    largest = max(m.bit_count() for m in masks)
+    if table is None:
+        table = TranspositionTable()
+
+    def solve(uncovered, limit):
+        '''
+          Return a smallest tuple of columns covering uncovered if it has
+          fewer than limit columns, else None
+        '''
+        if uncovered == 0:
+            return ()
+        lower = -(-uncovered.bit_count() // largest)
+        found, entry = table.lookup(uncovered)
+        if found:
+            if isinstance(entry, tuple):
+                return entry if len(entry) < limit else None
+            lower = max(lower, entry)
+        if lower >= limit:
+            return None
+        rarest = min(_bits(uncovered), key=lambda r: len(red.row_columns[r]))
+        best = None
+        for c in sorted(red.row_columns[rarest],
+                        key=lambda c: -(masks[c] & uncovered).bit_count()):
+            rest = solve(uncovered & ~masks[c], limit-1)
+            if rest is not None:
+                best = (c,) + rest
+                limit = len(best)
+                if limit == lower:
+                    break
+        # A cover found is the smallest; otherwise none is below limit
+        table.store(uncovered, limit if best is None else best)
+        return best
+
+    incumbent = red.greedy()
+    best = solve(red.full, len(incumbent))
+    return red.set_ids(incumbent if best is None else best)
+
+def optimal_covers(instance, engine='element'):
+    '''
+      Generate every minimum cover of instance, each as a sorted list of
+      set IDs, without holding more than the current search path.  The
+      minimum size is first found with the exact engine named engine,
+      which must minimize cover size, not weight.
+      The search then branches on the rarest uncovered row, excluding
+      each tried column from its later siblings; a minimum cover has
+      no covering proper subset, so each one is reached exactly once.
+      Repeated sets count once: covers that differ only in which
+      instance of a repeated set they use are not told apart.
+    '''
+    assert engine not in WEIGHTED_ENGINES, \
+        engine + ' does not minimize cover size'
+    size = len(ENGINES[engine](instance))
+    red = ReducedInstance(instance)
+    masks = red.masks
+    chosen = []
+
+    def search(uncovered, allowed):
+        if uncovered == 0:
+            yield sorted(red.set_ids(chosen))
+            return
+        left = size - len(chosen)
+        gain = max((masks[c] & uncovered).bit_count()
+                   for c in _bits(allowed)) if allowed else 0
+        if left == 0 or gain == 0 or -(-uncovered.bit_count() // gain) > left:
+            return
+        for c in _rarest_candidates(red, uncovered, allowed):
+            chosen.append(c)
+            yield from search(uncovered & ~masks[c], allowed)
+            chosen.pop()
+            allowed &= ~(1 << c)
+
+    yield from search(red.full, (1 << red.column_count) - 1)
+
+def stack_search(instance, weighted=False):
+    '''
+      element_branching without Python recursion, for instances deeper
+      than the recursion limit.  The search state lives in flat arrays
+      updated in place as columns are chosen and excluded: the bitmask
+      of the uncovered rows, per-row counts of allowed columns, and
+      per-column gains (uncovered rows) and exclusion flags.
+      Exclusions are recorded in an undo log, so a stack frame is just
+      (candidate columns, next candidate, undo log length) and
+      backtracking reverts only what the frame changed.  Each node only
+      scans the uncovered rows for the rarest one and ranks that row's
+      candidates.
+
+      If weighted, minimize the total weight of the cover instead of
+      its size; see weighted_search.
+    '''
+    red = ReducedInstance(instance)
+    rows = red.row_columns
+    columns = [list(_bits(m)) for m in red.masks]
+    masks = red.masks
+    largest = max(len(column) for column in columns)
+    cost = red.weights if weighted else [1] * red.column_count
+    allowed = [len(row) for row in rows]
+    gain = [len(column) for column in columns]
+    uncovered = red.full
+    spent = 0
+    excluded = bytearray(red.column_count)
+    undo = []
+    chosen = []
+    # The uncovered rows before each chosen column was chosen
+    previous = []
+    best = red.greedy(weighted)
+    best_cost = sum(cost[c] for c in best)
+    # Slack for rounding in the fractional weighted bounds, within
+    # which a bound counts as a tie
+    slack = 1e-9 * best_cost
+    # With integer weights a fractional bound can be rounded up
+    integral = all(isinstance(w, int) for w in cost)
+    sp = _scipy() if weighted else None
+    if sp is not None:
+        incidence = sp.sparse.csr_array(
+            (np.ones(sum(allowed)), [c for row in rows for c in row],
+             np.cumsum([0] + allowed)),
+            shape=(red.row_count, red.column_count))
+        weights = np.array(cost, dtype=float)
+
+    def choose(c):
+        nonlocal uncovered, spent
+        for r in _bits(uncovered & masks[c]):
+            for d in rows[r]:
+                gain[d] -= 1
+        previous.append(uncovered)
+        uncovered &= ~masks[c]
+        chosen.append(c)
+        spent += cost[c]
+
+    def unchoose(c):
+        nonlocal uncovered, spent
+        restored = previous.pop()
+        for r in _bits(restored & ~uncovered):
+            for d in rows[r]:
+                gain[d] += 1
+        uncovered = restored
+        chosen.pop()
+        spent -= cost[c]
+
+    def exclude(c):
+        excluded[c] = 1
+        for r in columns[c]:
+            allowed[r] -= 1
+        undo.append(c)
+
+    def include(c):
+        excluded[c] = 0
+        for r in columns[c]:
+            allowed[r] += 1
+
+    def ratio_bound():
+        '''
+          Return a lower bound on the weight needed to cover the
+          uncovered rows.  Each row costs at least the least weight per
+          new row among the columns that could cover it.
+        '''
+        return sum(min(cost[c] / gain[c] for c in rows[r] if not excluded[c])
+                   for r in _bits(uncovered))
+
+    def lp_bound():
+        '''
+          Solve the LP relaxation of covering the uncovered rows with
+          the allowed columns.  Return its value, or None if it is
+          infeasible, and the array of column values, or (ratio_bound(),
+          None) if the solver fails.
+        '''
+        left = list(_bits(uncovered))
+        open_columns = np.flatnonzero(
+            np.frombuffer(excluded, dtype=np.uint8) == 0)
+        result = sp.optimize.linprog(
+            weights[open_columns], A_ub=-incidence[left][:, open_columns],
+            b_ub=-np.ones(len(left)), bounds=(0, 1), method='highs')
+        if result.status == 2:
+            return None, None
+        if result.status != 0:
+            return ratio_bound(), None
+        x = np.zeros(red.column_count)
+        x[open_columns] = result.x
+        return result.fun, x
+
+    def lp_cover(x):
+        '''
+          Return the columns of x if x is a 0/1 cover of the uncovered
+          rows, else None
+        '''
+        if np.any((x > 1e-9) & (x < 1 - 1e-9)):
+            return None
+        cover = np.flatnonzero(x > 0.5).tolist()
+        left = uncovered
+        for c in cover:
+            left &= ~masks[c]
+        return cover if left == 0 else None
+
+    def branch():
+        '''
+          Return the candidate columns for the current node, best first,
+          or None if the node is a leaf or is pruned
+        '''
+        nonlocal best, best_cost
+        if uncovered == 0:
+            if spent < best_cost:
+                best, best_cost = list(chosen), spent
+            return None
+        if (not weighted and
+                spent - (-uncovered.bit_count() // largest) >= best_cost):
+            return None
+        rarest = min(_bits(uncovered), key=allowed.__getitem__)
+        if allowed[rarest] == 0:
+            return None
+        x = None
+        if weighted:
+            if sp is not None:
+                bound, x = lp_bound()
+                if bound is None:
+                    return None
+            else:
+                bound = ratio_bound()
+            # A node that can at best tie the incumbent is pruned
+            if integral:
+                bound = math.ceil(bound - 1e-6)
+                if spent + bound >= best_cost:
+                    return None
+            elif spent + bound >= best_cost - slack:
+                return None
+            cover = lp_cover(x) if x is not None else None
+            if cover is not None:
+                # The LP optimum is a cover, so it is this node's optimum
+                best = chosen + cover
+                best_cost = spent + sum(cost[c] for c in cover)
+                return None
+        candidates = [c for c in rows[rarest] if not excluded[c]]
+        if x is not None:
+            candidates.sort(key=lambda c: (-x[c], cost[c] / gain[c]))
+        else:
+            candidates.sort(key=lambda c: cost[c] / gain[c])
+        return candidates
+
+    frames = []
+    candidates = branch()
+    if candidates is not None:
+        frames.append([candidates, 0, 0])
+    while frames:
+        frame = frames[-1]
+        candidates, k, mark = frame
+        if k == len(candidates):
+            while len(undo) > mark:
+                include(undo.pop())
+            frames.pop()
+            if frames:
+                # Undo the parent's candidate and exclude it from the rest
+                c = chosen[-1]
+                unchoose(c)
+                exclude(c)
+            continue
+        frame[1] = k + 1
+        c = candidates[k]
+        if not weighted and spent + 1 - (
+                -(uncovered & ~masks[c]).bit_count() // largest) >= best_cost:
+            # Later candidates cover no more rows, so they fail too
+            frame[1] = len(candidates)
+            continue
+        choose(c)
+        children = branch()
+        if children is None:
+            unchoose(c)
+            exclude(c)
+        else:
+            frames.append([children, 0, len(undo)])
+    return red.set_ids(best)
+
+def weighted_search(instance):
+    '''
+      Exact minimum-weight cover: stack_search on the total weight
+      (SetCover.weight) of the cover, starting from the weighted greedy
+      incumbent.  With SciPy, a branch is pruned when its weight plus
+      the LP relaxation of covering its uncovered rows with its allowed
+      columns cannot beat the incumbent, and a 0/1 LP optimum is taken
+      as the branch's optimum; candidates are tried in decreasing LP
+      value.  Without SciPy the bound is, for each uncovered row, the
+      least weight per new row among the columns that could cover it.
+      With integer weights the bounds are rounded up.
+    '''
+    return stack_search(instance, weighted=True)
+
+def milp_search(instance, weighted=False, time_limit=None, report=None):
+    '''
+      Solve the instance as the 0/1 integer program
+          minimize c.x  subject to  A x >= 1,  x in {0, 1}
+      with SciPy's milp (HiGHS).  A is the element incidence of the
+      instance, one column per set ID; repeated sets other than the
+      one distinct_ids() keeps are fixed at 0.  c is the set weights if
+      weighted, else all ones.
+
+      time_limit, if given, bounds the solver's time in seconds; the
+      best cover found by then is returned, which may not be optimal.
+      report, if given, is a dict that receives the solver's status,
+      whether the cover is proven optimal, its objective value, the
+      dual bound, the relative gap and the wall time.
+    '''
+    sp = _scipy()
+    assert sp is not None, 'the milp engines require SciPy'
+    members = instance.element_incidence()
+    indices = np.frombuffer(members.indices, dtype=np.int32)
+    a = sp.sparse.csr_array(
+        (np.ones(len(indices)), indices,
+         np.frombuffer(members.offsets, dtype=np.int64)),
+        shape=(instance.universe_count, instance.set_count()))
+    if weighted:
+        c = np.array(instance.weight_list, dtype=float)
+    else:
+        c = np.ones(instance.set_count())
+    upper = np.zeros(instance.set_count())
+    upper[instance.distinct_ids()] = 1
+    options = {} if time_limit is None else {'time_limit': time_limit}
+    start = time.perf_counter()
+    result = sp.optimize.milp(
+        c, constraints=sp.optimize.LinearConstraint(a, lb=1),
+        integrality=np.ones(instance.set_count()),
+        bounds=sp.optimize.Bounds(0, upper), options=options)
+    wall_time = time.perf_counter() - start
+    if report is not None:
+        report.update(status=result.message, optimal=result.status == 0,
+                      value=result.fun,
+                      bound=getattr(result, 'mip_dual_bound', None),
+                      gap=getattr(result, 'mip_gap', None),
+                      wall_time=wall_time)
+    assert result.x is not None, 'no cover found: ' + result.message
+    return np.flatnonzero(result.x > 0.5).tolist()
+
+def milp_weighted_search(instance, **options):
+    ''' milp_search minimizing total weight rather than size '''
+    return milp_search(instance, weighted=True, **options)
+
+# Engines that accept the time_limit and report options
+MILP_ENGINES = ('milp', 'milp_weighted')
+
+# Engines that minimize the total weight rather than the size of the cover
+WEIGHTED_ENGINES = ('milp_weighted', 'weighted')
+
+ENGINES = {
+    'bnb': branch_and_bound,
+    'deepening': iterative_deepening,
+    'element': element_branching,
+    'gray': gray_code,
+    'gray_parallel': gray_code_parallel,
+    'memo': memoized,
+    'milp': milp_search,
+    'milp_weighted': milp_weighted_search,
+    'stack': stack_search,
+    'weighted': weighted_search,
+    }
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+  Greedy set cover engines.
+
+  Each engine takes an ORFile.SetCover instance and returns a list of
+  set IDs (positions in instance.set_list) whose sets cover the
+  universe, in the order they were chosen.  Only the distinct sets of
+  the instance (SetCover.distinct_ids()) are candidates.
+
+  Ties between sets of equal gain go to the lowest set ID, so every
+  engine that follows the classic rule returns the same cover.
+  All engines but weighted_greedy ignore the set weights.
+'''
+
+from collections import Counter
+import heapq
+from itertools import chain
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def classic_greedy(instance):
+    '''
+      Classic greedy: at each step rescan every remaining set for the
+      one covering the most uncovered elements.  Kept as the reference
+      that the faster engines are compared against.
+    '''
+    sets = instance.set_list
+    uncovered = instance.universe()
+    remaining = instance.distinct_ids()
+    cover = []
+    while uncovered:
+        best, best_gain = None, 0
+        for i in remaining:
+            gain = len(uncovered.intersection(sets[i]))
+            if gain > best_gain:
+                best, best_gain = i, gain
+        assert best is not None, 'instance has no cover'
+        cover.append(best)
+        uncovered -= sets[best]
+        remaining.remove(best)
+    return cover
+
+def lazy_greedy(instance):
+    '''
+      Lazy greedy: keep each set's gain in a max-heap.  A set's gain
+      can only shrink as elements are covered, so a stale entry is an
+      upper bound; it is re-evaluated only when it reaches the top, and
+      a set whose fresh gain is still on top is the classic choice.
+    '''
+    sets = instance.set_list
+    uncovered = instance.universe()
+    # Entries are (-gain, set ID, cover length when gain was computed)
+    heap = [(-len(sets[i]), i, 0) for i in instance.distinct_ids()]
+    heapq.heapify(heap)
+    cover = []
+    while uncovered:
+        assert heap, 'instance has no cover'
+        neg_gain, i, stamp = heapq.heappop(heap)
+        if stamp == len(cover):
+            cover.append(i)
+            uncovered -= sets[i]
+            continue
+        gain = len(uncovered.intersection(sets[i]))
+        if gain > 0:
+            heapq.heappush(heap, (-gain, i, len(cover)))
+    return cover
+
+def bitset_greedy(instance):
+    '''
+      Lazy greedy on bitmasks (SetCover.bitmasks()).  Gains are
+      popcounts of mask & uncovered, which run at machine-word speed;
+      the cover is the same as lazy_greedy's.
+    '''
+    masks = instance.bitmasks()
+    uncovered = instance.universe_mask()
+    heap = [(-masks[i].bit_count(), i, 0) for i in instance.distinct_ids()]
+    heapq.heapify(heap)
+    cover = []
+    while uncovered:
+        assert heap, 'instance has no cover'
+        neg_gain, i, stamp = heapq.heappop(heap)
+        if stamp == len(cover):
+            cover.append(i)
+            uncovered &= ~masks[i]
+            continue
+        gain = (masks[i] & uncovered).bit_count()
+        if gain > 0:
+            heapq.heappush(heap, (-gain, i, len(cover)))
+    return cover
+
+def interval_greedy(instance):
+    '''
+      Lazy greedy on run-length encoded sets (SetCover.interval_sets()).
+      Each gain and update costs time proportional to the number of
+      runs involved, which suits instances made of a few contiguous
+      ranges; the cover is the same as lazy_greedy's.
+    '''
+    sets = instance.interval_sets()
+    uncovered = instance.universe_intervals()
+    heap = [(-len(sets[i]), i, 0) for i in instance.distinct_ids()]
+    heapq.heapify(heap)
+    cover = []
+    while len(uncovered):
+        assert heap, 'instance has no cover'
+        neg_gain, i, stamp = heapq.heappop(heap)
+        if stamp == len(cover):
+            cover.append(i)
+            uncovered = uncovered.difference(sets[i])
+            continue
+        gain = sets[i].intersection_size(uncovered)
+        if gain > 0:
+            heapq.heappush(heap, (-gain, i, len(cover)))
+    return cover
+
+def weighted_greedy(instance):
+    '''
+      Weighted greedy: at each step choose the set of least weight per
+      newly covered element.  Ratios are kept in a min-heap and
+      re-evaluated lazily, as in lazy_greedy; a set's ratio can only
+      grow as elements are covered, so a stale entry is a lower bound.
+    '''
+    sets = instance.set_list
+    weights = instance.weight_list
+    uncovered = instance.universe()
+    # Entries are (weight/gain, set ID, cover length when computed)
+    # Empty sets never cover anything and would divide by zero
+    heap = [(weights[i]/len(sets[i]), i, 0)
+            for i in instance.distinct_ids() if sets[i]]
+    heapq.heapify(heap)
+    cover = []
+    while uncovered:
+        assert heap, 'instance has no cover'
+        ratio, i, stamp = heapq.heappop(heap)
+        if stamp == len(cover):
+            cover.append(i)
+            uncovered -= sets[i]
+            continue
+        gain = len(uncovered.intersection(sets[i]))
+        if gain > 0:
+            heapq.heappush(heap, (weights[i]/gain, i, len(cover)))
+    return cover
+
+class _Coverage():
+    '''
+      Track which elements are covered as sets are chosen, using the
+      set and element incidences of a SetCover.  choose(i) marks the
+      elements of set i covered and returns how many were newly covered
+      together with (set ID, elements of that set newly covered) for
+      every set touched, in no particular order.  With NumPy each call
+      runs in bulk array operations on scratch arrays indexed by set
+      ID; without it, in one Python pass over set i and a Counter over
+      the member lists of the newly covered elements.
+      Either way a call takes time proportional to the memberships of
+      the newly covered elements, and over a whole run each membership
+      is visited once.
+    '''
+    def __init__(self, instance):
+        self.sets = instance.set_incidence()
+        self.members = instance.element_incidence()
+        if np is not None:
+            self.covered = np.zeros(instance.universe_count, dtype=bool)
+            self.set_offsets = np.frombuffer(self.sets.offsets,
+                                             dtype=np.int64)
+            self.set_indices = np.frombuffer(self.sets.indices,
+                                             dtype=np.int32)
+            self.member_offsets = np.frombuffer(self.members.offsets,
+                                                dtype=np.int64)
+            self.member_indices = np.frombuffer(self.members.indices,
+                                                dtype=np.int32)
+            # Per set ID: elements newly covered in the current call,
+            # kept at zero between calls, and the last position at which
+            # the ID was gathered
+            self.lost = np.zeros(instance.set_count(), dtype=np.int64)
+            self.owner = np.zeros(instance.set_count(), dtype=np.int64)
+            self.choose = self._choose_bulk
+        else:
+            self.covered = bytearray(instance.universe_count)
+
+    def choose(self, i):
+        ''' Cover the elements of set i '''
+        covered = self.covered
+        newly = 0
+        # Runs [start, stop) of consecutive newly covered elements, whose
+        # member lists are contiguous in the element incidence
+        runs = []
+        stop = -1
+        for e in self.sets.row(i):
+            if covered[e]:
+                continue
+            covered[e] = 1
+            newly += 1
+            if e == stop:
+                runs[-1][1] = stop = e + 1
+            else:
+                runs.append([e, e + 1])
+                stop = e + 1
+        # Counter tallies the member lists without sorting them
+        offsets, indices = self.members
+        touched = Counter(chain.from_iterable(
+            indices[offsets[start]:offsets[stop]] for start, stop in runs))
+        return newly, touched.items()
+
+    def _choose_bulk(self, i):
+        ''' Cover the elements of set i, with NumPy '''
+        row = self.set_indices[self.set_offsets[i]:self.set_offsets[i+1]]
+        new = row[~self.covered[row]]
+        self.covered[new] = True
+        # Gather the member lists of the newly covered elements
+        starts = self.member_offsets[new]
+        counts = self.member_offsets[new+1] - starts
+        total = int(counts.sum())
+        firsts = np.cumsum(counts) - counts
+        positions = (np.arange(total, dtype=np.int64) +
+                     np.repeat(starts - firsts, counts))
+        gathered = self.member_indices[positions]
+        np.add.at(self.lost, gathered, 1)
+        # Keep one position per set ID: whichever write to owner won
+        order = np.arange(total, dtype=np.int64)
+        self.owner[gathered] = order
+        ids = gathered[self.owner[gathered] == order]
+        lost = self.lost[ids]
+        self.lost[ids] = 0
+        return len(new), zip(ids.tolist(), lost.tolist())
+
+def bucket_greedy(instance):
+    '''
+      Bucket-queue greedy for unit weights, in time linear in the total
+      size of the sets.  buckets[g] lists sets whose gain was g when
+      they were filed; when a set is chosen, every candidate set sharing
+      a newly covered element loses that much gain and is refiled in a
+      lower bucket.  Entries whose recorded gain no longer matches are
+      skipped.  Ties go to the most recently filed set rather than the
+      lowest ID, so the cover can differ from classic_greedy's in which
+      sets are chosen, though not in the rule used to choose them.
+    '''
+    sets = instance.set_incidence()
+    ids = instance.distinct_ids()
+    candidate = bytearray(instance.set_count())
+    gain = [0] * instance.set_count()
+    for i in ids:
+        candidate[i] = 1
+        gain[i] = sets.offsets[i+1] - sets.offsets[i]
+    top = max(gain)
+    # Gains can be as large as the universe, so only occupied buckets
+    # are materialized
+    buckets = {}
+    for i in reversed(ids):
+        buckets.setdefault(gain[i], []).append(i)
+    coverage = _Coverage(instance)
+    uncovered_count = instance.universe_count
+    cover = []
+    while uncovered_count:
+        while top > 0 and not buckets.get(top):
+            top -= 1
+        assert top > 0, 'instance has no cover'
+        i = buckets[top].pop()
+        if not candidate[i] or gain[i] != top:
+            continue
+        cover.append(i)
+        candidate[i] = 0
+        newly, touched = coverage.choose(i)
+        uncovered_count -= newly
+        for j, lost in touched:
+            if candidate[j]:
+                gain[j] -= lost
+                if gain[j] > 0:
+                    buckets.setdefault(gain[j], []).append(j)
+    return cover
+
+ENGINES = {
+    'bitset': bitset_greedy,
+    'bucket': bucket_greedy,
+    'classic': classic_greedy,
+    'interval': interval_greedy,
+    'lazy': lazy_greedy,
+    'weighted': weighted_greedy,
+    }
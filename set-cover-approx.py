@@ -5,11 +5,22 @@
 '''
 # Standard modules
 import argparse
+import contextlib
+import json
+import sys
 import time
+import tracemalloc
+try:
+    import resource
+except ImportError:
+    resource = None
 
 # Local module for reading data files in Beasley Operations Research (OR)
 # format
 import ORFile
+# Local modules of greedy and exact engines
+import greedy
+import exact
 
 def parse_args():
     argp = argparse.ArgumentParser(description='Compute set cover, '
@@ -26,25 +37,76 @@ def parse_args():
         action='store_true',
         help='Do not print the result'
         )
+    argp.add_argument('--print_format',
+        choices=['elements', 'ranges', 'ids'],
+        default='elements',
+        help='Print each set of the cover as its elements, as ranges of '
+        'consecutive elements, or print only the set IDs '
+        '(default: %(default)s)'
+        )
     argp.add_argument('--use_optimal',
         action='store_true',
         help='Call the MUCH SLOWER optimal algorithm instead of set_cover()'
         )
-    return argp.parse_args()
+    argp.add_argument('--no_cache',
+        action='store_true',
+        help='Parse the input text, ignoring and not writing the binary cache'
+        )
+    argp.add_argument('--engine',
+        choices=sorted(greedy.ENGINES),
+        default='lazy',
+        help='Greedy engine used by set_cover() (default: %(default)s)'
+        )
+    argp.add_argument('--optimal_engine',
+        choices=['enumerate'] + sorted(exact.ENGINES),
+        default='bnb',
+        help='Exact engine used by optimum_set_cover(); enumerate is the '
+        'original recursive enumeration (default: %(default)s)'
+        )
+    argp.add_argument('--time_limit',
+        type=float,
+        help='Time limit in seconds for the milp engines'
+        )
+    argp.add_argument('--stats',
+        metavar='FILE',
+        help='Write wall time, CPU time and peak memory of each stage as '
+        'JSON to FILE, or to standard error if FILE is -'
+        )
+    args = argp.parse_args()
+    if args.time_limit is not None and not (
+            args.use_optimal and args.optimal_engine in exact.MILP_ENGINES):
+        argp.error('--time_limit requires --use_optimal with one of the '
+                   'engines ' + ', '.join(exact.MILP_ENGINES))
+    if (args.use_optimal and args.optimal_engine in exact.MILP_ENGINES and
+            not exact.scipy_available()):
+        argp.error('--optimal_engine {} requires SciPy'.format(
+            args.optimal_engine))
+    return args
 
-# This is the ONLY FUNCTION that you should modify
-def set_cover(universe, subsets):
+def set_cover(universe, subsets, engine='lazy', instance=None):
     """
         Find a family of subsets that covers the universal set.
         universe: range(N), where N is the size of the universe
         subsets: set of frozensets, each a subset of the universe
+        engine: name of the greedy engine, a key of greedy.ENGINES
+        instance: the ORFile.SetCover that subsets came from, if any;
+            passing it saves rebuilding one from subsets
         Return a subset of subsets that covers the universe.
         The result can be either:
         (i) a list of sets, or
         (ii) a set of frozensets (Python does not permit sets of sets).
     """
-    # YOUR CODE GOES HERE
-    return cover
+    if instance is None:
+        subsets = list(subsets)
+        instance = ORFile.SetCover(len(universe), subsets, [1]*len(subsets))
+    return instance.sets_of(set_cover_ids(instance, engine))
+
+def set_cover_ids(instance, engine='lazy'):
+    '''
+        Find a cover of the ORFile.SetCover instance with the named
+        greedy engine and return it as a list of set IDs
+    '''
+    return greedy.ENGINES[engine](instance)
 
 '''
     Algorithm for computing optimal answer.
@@ -77,34 +139,195 @@ def sub_cover(uncovered, setlist):
     sols |= sub_cover(uncovered, setlist - {s})
     return sols
 
-def optimum_set_cover(universe, setlist):
-    ''' Top level call to recursive algorithm '''
-    solutions = sub_cover(universe, setlist)
-    # Return the smallest solution
-    return min(solutions, key=lambda s: len(s))
+def optimum_set_cover(universe, setlist, engine='bnb', instance=None,
+                      **options):
+    '''
+        Top level call to the selected exact engine.
+        engine: 'enumerate' for the recursive algorithm above, or a key
+            of exact.ENGINES
+        instance: the ORFile.SetCover that setlist came from, if any
+        options: passed on to the engine, such as time_limit and
+            report for the milp engines
+    '''
+    if engine == 'enumerate':
+        solutions = sub_cover(universe, setlist)
+        # Return the smallest solution
+        return min(solutions, key=lambda s: len(s))
+    if instance is None:
+        setlist = list(setlist)
+        instance = ORFile.SetCover(len(universe), setlist, [1]*len(setlist))
+    return instance.sets_of(optimum_set_cover_ids(instance, engine, **options))
+
+def optimum_set_cover_ids(instance, engine='bnb', **options):
+    '''
+        Find a minimum cover of the ORFile.SetCover instance with the
+        named exact engine and return it as a list of set IDs
+    '''
+    if engine == 'enumerate':
+        return instance.ids_of(optimum_set_cover(
+            instance.universe(), instance.set_of_sets(), engine))
+    return exact.ENGINES[engine](instance, **options)
+
+def verify(instance, ids):
+    '''
+        Verify a cover given as set IDs of instance, and report any
+        invalid IDs, uncovered elements and redundant sets on standard
+        error
+    '''
+    check = instance.verify(ids)
+    if check.invalid:
+        print('{} invalid set IDs: {}'.format(
+            len(check.invalid), ' '.join(map(str, check.invalid))),
+            file=sys.stderr)
+    if check.uncovered:
+        print('{} uncovered elements: {}'.format(
+            len(check.uncovered), ' '.join(map(str, check.uncovered[:20]))),
+            file=sys.stderr)
+    if check.redundant:
+        print('{} redundant sets, IDs: {}'.format(
+            len(check.redundant), ' '.join(map(str, check.redundant))),
+            file=sys.stderr)
+    return check
+
+def format_range(start, stop):
+    ''' Format the half-open run [start, stop) as "a" or "a-b" '''
+    if stop - start == 1:
+        return str(start)
+    return '{}-{}'.format(start, stop-1)
+
+def write_cover(instance, ids, print_format='elements', out=None):
+    '''
+        Write the cover given as set IDs of instance to out (standard
+        output by default), one line per set.  Each line is built with
+        a single join, and the lines are handed to the stream in one
+        call.  print_format 'elements' writes the elements of the set in
+        increasing order, 'ranges' writes runs of consecutive elements
+        as a-b, and 'ids' writes only the set IDs, on one line.
+    '''
+    if out is None:
+        out = sys.stdout
+    if print_format == 'ids':
+        out.write(' '.join(map(str, ids)) + '\n')
+        return
+    incidence = instance.set_incidence()
+    if print_format == 'ranges':
+        lines = (' '.join(format_range(start, stop) for start, stop in
+                          ORFile.IntervalSet.from_sorted(incidence.row(i)).runs)
+                 + '\n' for i in ids)
+    else:
+        lines = (' '.join(map(str, incidence.row(i))) + '\n' for i in ids)
+    out.writelines(lines)
+
+class Stats():
+    '''
+        Record the wall time, CPU time and peak memory of the stages of
+        a run.  traced_peak is the peak of Python allocations during the
+        stage, from tracemalloc; rss_peak is the high-water mark of the
+        process's resident set size at the end of the stage, so it
+        never decreases from one stage to the next.  Both are in bytes.
+        A disabled Stats measures nothing.
+    '''
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+        self.results = {}
+        if enabled:
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        ''' Measure the body of a with statement as stage name '''
+        if not self.enabled:
+            yield
+            return
+        tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        yield
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        self.stages[name] = {
+            'wall': wall,
+            'cpu': cpu,
+            'traced_peak': tracemalloc.get_traced_memory()[1],
+            'rss_peak': self.rss_peak(),
+            }
+
+    @staticmethod
+    def rss_peak():
+        ''' Return the peak RSS of the process in bytes, or None '''
+        if resource is None:
+            return None
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def write(self, fname):
+        ''' Write the stages and results as JSON to fname, '-' for stderr '''
+        if not self.enabled:
+            return
+        report = dict(self.results, stages=self.stages)
+        if fname == '-':
+            json.dump(report, sys.stderr, indent=2)
+            print(file=sys.stderr)
+        else:
+            with open(fname, 'w') as out:
+                json.dump(report, out, indent=2)
+                print(file=out)
 
-def main(instance, args):
+def main(instance, args, stats=None):
     ''' Run the selected algorithm and print the results '''
+    if stats is None:
+        stats = Stats(enabled=False)
+    options = {}
     if args.use_optimal:
-        start = time.perf_counter()
-        cover = optimum_set_cover(instance.universe(), instance.set_of_sets())
-        end = time.perf_counter()
+        engine = args.optimal_engine
+        if args.optimal_engine in exact.MILP_ENGINES:
+            options = {'time_limit': args.time_limit, 'report': {}}
+        if args.optimal_engine == 'memo':
+            options = {'table': exact.TranspositionTable()}
+        with stats.stage('solve'):
+            start = time.perf_counter()
+            cover = optimum_set_cover_ids(instance, args.optimal_engine,
+                                          **options)
+            end = time.perf_counter()
+        if 'report' in options:
+            print(', '.join('{}: {}'.format(k, v)
+                            for k, v in options['report'].items()),
+                  file=sys.stderr)
     else:
-        start = time.perf_counter()
-        cover = set_cover(instance.universe(), instance.set_of_sets())
-        end = time.perf_counter()
-    if args.check and not instance.check_solution(cover):
-        print('*** Not a solution! ***')
+        engine = args.engine
+        with stats.stage('solve'):
+            start = time.perf_counter()
+            cover = set_cover_ids(instance, args.engine)
+            end = time.perf_counter()
+    stats.results.update(input=args.input, optimal=args.use_optimal,
+                         engine=engine, size=len(cover),
+                         weight=instance.cover_weight(cover))
+    if 'table' in options:
+        stats.results['table'] = options['table'].stats()
+    if args.check:
+        with stats.stage('check'):
+            check = verify(instance, cover)
+        stats.results['ok'] = check.ok
+        if not check.ok:
+            print('*** Not a solution! ***')
     print(end-start)
     print(len(cover))
+    print(instance.cover_weight(cover))
     if args.skip_print:
         return
-    for s in cover:
-        for v in s:
-            print(v, end=' ')
-        print()
+    with stats.stage('print'):
+        write_cover(instance, cover, args.print_format)
+        sys.stdout.flush()
 
 if __name__ == '__main__':
     args = parse_args()
-    instance = ORFile.ORFile(args.input).get_set_cover()
-    main(instance, args)
+    stats = Stats(enabled=args.stats is not None)
+    # With --stats, validation is run and measured as its own stage
+    with stats.stage('parse'):
+        instance = ORFile.ORFile(args.input, use_cache=not args.no_cache,
+            validate=args.stats is None).get_set_cover()
+    if args.stats is not None:
+        with stats.stage('validate'):
+            instance.validate()
+    main(instance, args, stats)
+    stats.write(args.stats)
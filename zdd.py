@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+  Zero-suppressed decision diagram (ZDD) of the covers of a set cover
+  instance.
+
+  The diagram represents the family of all subsets of the distinct sets
+  that cover the universe, sharing equal subproblems, so the covers can
+  be counted, the minimum covers counted and covers sampled uniformly
+  without enumerating them.
+'''
+
+import random
+
+from exact import ReducedInstance
+
+def _minimal(constraints):
+    '''
+      Return the constraints that do not include another one, as a
+      sorted tuple.  Meeting those meets all of them.
+    '''
+    kept = []
+    for k in sorted(set(constraints), key=lambda k: (k.bit_count(), k)):
+        if all(j & ~k for j in kept):
+            kept.append(k)
+    return tuple(sorted(kept))
+
+class CoverZDD():
+    '''
+      ZDD over the columns of a ReducedInstance, taken in column order.
+      Node 0 is the empty family, node 1 the family holding only the
+      empty set; node n > 1 tests column var[n], with lo[n] the covers
+      without it and hi[n] the covers with it.  Nodes are numbered so
+      that children come before their parents.
+    '''
+    ZERO = 0
+    ONE = 1
+
+    def __init__(self, instance):
+        ''' Build the ZDD of the covers of instance '''
+        red = ReducedInstance(instance)
+        self.ids = red.ids
+        self.var = [None, None]
+        self.lo = [None, None]
+        self.hi = [None, None]
+        unique = {}
+        m = red.column_count
+
+        # A subproblem is (first column c, constraints): each constraint
+        # is the bitmask of the columns >= c of a row not yet covered,
+        # and a subset of those columns is a cover if it meets every
+        # constraint.  Keeping only the minimal constraints makes equal
+        # subproblems compare equal, so they are built once.
+        def child(c, constraints, take):
+            ''' Return the subproblem after deciding column c '''
+            bit = 1 << c
+            if take:
+                rest = [k for k in constraints if not k & bit]
+            else:
+                rest = [k & ~bit for k in constraints]
+                if 0 in rest:
+                    return None
+            return (c+1, _minimal(rest))
+
+        # Depth-first construction with an explicit stack, so deep
+        # instances do not reach the recursion limit
+        root = (0, _minimal(red.row_masks))
+        memo = {None: CoverZDD.ZERO}
+        stack = [root]
+        while stack:
+            key = stack[-1]
+            if key in memo:
+                stack.pop()
+                continue
+            c, constraints = key
+            if c == m:
+                memo[key] = CoverZDD.ONE
+                stack.pop()
+                continue
+            children = [child(c, constraints, False),
+                        child(c, constraints, True)]
+            pending = [k for k in children if k not in memo]
+            if pending:
+                stack.extend(pending)
+                continue
+            lo, hi = memo[children[0]], memo[children[1]]
+            if hi == CoverZDD.ZERO:
+                node = lo
+            else:
+                node = unique.get((c, lo, hi))
+                if node is None:
+                    node = len(self.var)
+                    self.var.append(c)
+                    self.lo.append(lo)
+                    self.hi.append(hi)
+                    unique[(c, lo, hi)] = node
+            memo[key] = node
+            stack.pop()
+        self.root = memo[root]
+
+        # Per node: number of sets in the family, smallest set size and
+        # number of sets of that size
+        self._count = [0, 1]
+        self._min_size = [None, 0]
+        self._min_count = [0, 1]
+        for n in range(2, len(self.var)):
+            lo, hi = self.lo[n], self.hi[n]
+            self._count.append(self._count[lo] + self._count[hi])
+            sizes = []
+            if self._min_size[lo] is not None:
+                sizes.append((self._min_size[lo], self._min_count[lo]))
+            if self._min_size[hi] is not None:
+                sizes.append((self._min_size[hi] + 1, self._min_count[hi]))
+            size = min(s for s, _ in sizes)
+            self._min_size.append(size)
+            self._min_count.append(sum(k for s, k in sizes if s == size))
+
+    def __len__(self):
+        ''' Return the number of nodes, including the two terminals '''
+        return len(self.var)
+
+    def count(self):
+        ''' Return the number of covers '''
+        return self._count[self.root]
+
+    def minimum_size(self):
+        ''' Return the size of a minimum cover '''
+        return self._min_size[self.root]
+
+    def count_minimum(self):
+        ''' Return the number of minimum covers '''
+        return self._min_count[self.root]
+
+    def sample(self, rng=random):
+        ''' Return a cover chosen uniformly at random, as set IDs '''
+        cover = []
+        n = self.root
+        while n > CoverZDD.ONE:
+            if rng.randrange(self._count[n]) < self._count[self.hi[n]]:
+                cover.append(self.ids[self.var[n]])
+                n = self.hi[n]
+            else:
+                n = self.lo[n]
+        return cover
+
+    def sample_minimum(self, rng=random):
+        '''
+          Return a minimum cover chosen uniformly at random, as set IDs
+        '''
+        cover = []
+        n = self.root
+        while n > CoverZDD.ONE:
+            lo, hi = self.lo[n], self.hi[n]
+            size = self._min_size[n]
+            hi_count = (self._min_count[hi]
+                        if self._min_size[hi] == size - 1 else 0)
+            if rng.randrange(self._min_count[n]) < hi_count:
+                cover.append(self.ids[self.var[n]])
+                n = hi
+            else:
+                n = lo
+        return cover